@@ -0,0 +1,36 @@
+"""
+Map between ISO 3166 country codes and country names.
+
+Usage:
+    python -m country_codes [Options] <country>
+    python -m country_codes --serve
+
+[Options]
+    See country_code.py.
+
+--serve keeps the country maps resident and answers lookups from `country_code --client` over a unix socket
+(see daemon.default_socket_path).
+"""
+
+###############################################################################################################################################################
+#
+#       Import
+#
+###############################################################################################################################################################
+
+import sys
+
+
+###############################################################################################################################################################
+#
+#       __main__
+#
+###############################################################################################################################################################
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--serve"]:
+        from country_codes.daemon import serve
+        exit(serve())
+    else:
+        from country_codes.country_code import main
+        exit(main(sys.argv[1:]))
@@ -5,7 +5,8 @@ Usage:
     country_code [Options] <country>
 
 [Options]
-    --iso:  Interpret <country> as an ISO code and show the corresponding country.
+    --iso:     Interpret <country> as an ISO code and show the corresponding country.
+    --client:  Ask the resident daemon (python -m country_codes --serve) first, falling back to a local lookup.
 """
 
 ###############################################################################################################################################################
@@ -14,20 +15,39 @@ Usage:
 #
 ###############################################################################################################################################################
 
-import argparse
+import sys
 import typing
 
 from country_codes import COUNTRY_CODES
 
 
+###############################################################################################################################################################
+#
+#       remote_lookup
+#
+###############################################################################################################################################################
+
+def remote_lookup(op: str, query: str) -> typing.Optional[typing.Dict[str, typing.Optional[str]]]:
+    """ Return the daemon's answer to <op> <query>, or None if the daemon cannot be used. """
+    try:
+        from country_codes import daemon
+        return daemon.request(op, query)
+    except (ImportError, OSError, ValueError):
+        return None
+
+
 ###############################################################################################################################################################
 #
 #       country_from_iso
 #
 ###############################################################################################################################################################
 
-def country_from_iso(iso: str) -> int:
-    if (country := COUNTRY_CODES.country_from_iso(iso)) is None:
+def country_from_iso(iso: str, client: bool=False) -> int:
+    if client and (response := remote_lookup("iso", iso)) is not None:
+        country = response["country"]
+    else:
+        country = COUNTRY_CODES.country_from_iso(iso)
+    if country is None:
         print(f"Unknown country ISO: {iso}")
         return -1        
     print(f"{iso}: {country}")
@@ -40,24 +60,59 @@ def country_from_iso(iso: str) -> int:
 #
 ###############################################################################################################################################################
 
-def iso_from_country(country: str) -> int:
-    if (country_match := COUNTRY_CODES.match_country(country)) is None:
+def iso_from_country(country: str, client: bool=False) -> int:
+    if client and (response := remote_lookup("country", country)) is not None:
+        country_match, iso = response["country"], response["iso"]
+    elif (country_match := COUNTRY_CODES.match_country(country)) is not None:
+        iso = COUNTRY_CODES.iso_from_country(country_match)
+    if country_match is None:
         print(f"Unknown country: {country}")
         return -1
-    print(country_match)
-    print(f"{country_match}: {COUNTRY_CODES.iso_from_country(country_match)}")
+    print(f"{country_match}\n{country_match}: {iso}")
     return 0
 
 
 ###############################################################################################################################################################
 #
-#       __main__
+#       parse_args
 #
 ###############################################################################################################################################################
 
-if __name__ == "__main__":
+def parse_args(argv: typing.List[str]) -> typing.Tuple[bool, bool, str]:
+    """ Return (iso, client, query) from the command line arguments.
+
+    The supported forms (<query> plus optional --iso / --client flags) are recognised directly so the common case does
+    not import argparse; anything else, including --help and usage errors, is handed to argparse.
+    """
+    queries = [arg for arg in argv if not arg.startswith("-")]
+    options = {arg for arg in argv if arg.startswith("-")}
+    if len(queries) == 1 and len(options) == len(argv) - 1 and options <= {"--iso", "--client"}:
+        return "--iso" in options, "--client" in options, queries[0]
+    import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--iso", action="store_true", help="Interpret the argument as an ISO and show the corresponding country.")
+    parser.add_argument("--client", action="store_true", help="Ask the resident daemon first, falling back to a local lookup.")
     parser.add_argument("query", type=str, help="The ISO country code or name of the country to convert.")
-    args = parser.parse_args()   
-    exit(country_from_iso(args.query) if args.iso else iso_from_country(args.query))
+    args = parser.parse_args(argv)
+    return args.iso, args.client, args.query
+
+
+###############################################################################################################################################################
+#
+#       main
+#
+###############################################################################################################################################################
+
+def main(argv: typing.List[str]) -> int:
+    iso, client, query = parse_args(argv)
+    return country_from_iso(query, client) if iso else iso_from_country(query, client)
+
+
+###############################################################################################################################################################
+#
+#       __main__
+#
+###############################################################################################################################################################
+
+if __name__ == "__main__":
+    exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+"""
+Serve country code lookups from a resident process over a unix socket.
+
+Each request is one json line, {"op": "iso" | "country", "query": <str>}, answered by one json line,
+{"country": <str | null>, "iso": <str | null>} or {"error": <str>} for malformed requests.
+"""
+
+###############################################################################################################################################################
+#
+#       Import
+#
+###############################################################################################################################################################
+
+from pathlib import Path
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import typing
+
+from country_codes import COUNTRY_CODES
+from country_codes.iso_3166_country_codes import _rapidfuzz
+
+
+###############################################################################################################################################################
+#
+#       Global
+#
+###############################################################################################################################################################
+
+# Seconds the client waits for the daemon before falling back to a local lookup.
+CLIENT_TIMEOUT = 5
+
+
+###############################################################################################################################################################
+#
+#       default_socket_path
+#
+###############################################################################################################################################################
+
+def default_socket_path() -> Path:
+    """ $COUNTRY_CODES_SOCKET, else country_codes.sock in $XDG_RUNTIME_DIR, else a socket in a private per-user directory under the temp directory. """
+    if path := os.environ.get("COUNTRY_CODES_SOCKET"):
+        return Path(path)
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(runtime_dir)/"country_codes.sock"
+    user = f"-{os.getuid()}" if hasattr(os, "getuid") else ""
+    return Path(tempfile.gettempdir())/f"country_codes{user}"/"daemon.sock"
+
+
+###############################################################################################################################################################
+#
+#       check_directory
+#
+###############################################################################################################################################################
+
+def check_directory(directory: Path) -> None:
+    """ Raise PermissionError unless no other user can replace entries in <directory>.
+
+    That is a real directory owned by the current user and not writable by anyone else, or a sticky directory owned by root such as /tmp.
+    """
+    if not hasattr(os, "getuid"):
+        return
+    st = directory.lstat()
+    private = st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    sticky = st.st_uid == 0 and st.st_mode & stat.S_ISVTX
+    if not stat.S_ISDIR(st.st_mode) or not (private or sticky):
+        raise PermissionError(f"{directory} can be modified by other users.")
+
+
+###############################################################################################################################################################
+#
+#       check_socket
+#
+###############################################################################################################################################################
+
+def check_socket(socket_path: Path) -> None:
+    """ Raise FileNotFoundError if <socket_path> does not exist, or PermissionError unless it is a unix socket owned by the current user. """
+    st = socket_path.lstat()
+    if not stat.S_ISSOCK(st.st_mode) or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+        raise PermissionError(f"{socket_path} is not a socket owned by the current user.")
+
+
+###############################################################################################################################################################
+#
+#       lookup
+#
+###############################################################################################################################################################
+
+def lookup(op: str, query: str) -> typing.Dict[str, typing.Optional[str]]:
+    """ Answer a single request with the in-process COUNTRY_CODES. """
+    if not isinstance(query, str):
+        raise TypeError(f"Query must be a string, not {type(query).__name__}.")
+    if op == "iso":
+        country = COUNTRY_CODES.country_from_iso(query)
+    elif op == "country":
+        country = COUNTRY_CODES.match_country(query)
+    else:
+        raise ValueError(f"Unknown op: {op}")
+    if country is None:
+        return {"country": None, "iso": None}
+    return {"country": country, "iso": COUNTRY_CODES.iso_from_country(country)}
+
+
+###############################################################################################################################################################
+#
+#       CountryCodesHandler
+#
+###############################################################################################################################################################
+
+class CountryCodesHandler(socketserver.StreamRequestHandler):
+    """ Answer json line requests until the client closes the connection. """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = lookup(request["op"], request["query"])
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": str(e)}
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                # The client went away before reading its reply.
+                return
+
+
+###############################################################################################################################################################
+#
+#       warm_up
+#
+###############################################################################################################################################################
+
+def warm_up() -> None:
+    """ Build the country maps and import rapidfuzz, so that the first requests do not pay for either. """
+    _ = COUNTRY_CODES.maps
+    _rapidfuzz()
+
+
+###############################################################################################################################################################
+#
+#       serve
+#
+###############################################################################################################################################################
+
+def serve(socket_path: typing.Optional[Path]=None) -> int:
+    """ Build the country maps once and answer requests on <socket_path> (default_socket_path()) until interrupted. """
+    socket_path = socket_path or default_socket_path()
+    try:
+        socket_path.parent.mkdir(mode=0o700, exist_ok=True)
+        check_directory(socket_path.parent)
+    except OSError as e:
+        print(e)
+        return -1
+    # Only remove a stale socket of our own; anything else at the path, or a socket a daemon still accepts connections on, is left alone.
+    try:
+        check_socket(socket_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(e)
+        return -1
+    else:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(socket_path))
+            except OSError:
+                pass
+            else:
+                print(f"A country codes daemon is already running on {socket_path}")
+                return -1
+        socket_path.unlink()
+    warm_up()
+    with socketserver.ThreadingUnixStreamServer(str(socket_path), CountryCodesHandler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+    return 0
+
+
+###############################################################################################################################################################
+#
+#       request
+#
+###############################################################################################################################################################
+
+def request(op: str, query: str, socket_path: typing.Optional[Path]=None) -> typing.Dict[str, typing.Optional[str]]:
+    """ Send a single request to the daemon at <socket_path> (default_socket_path()).
+
+    Raises OSError if the daemon cannot be reached, and ValueError for an error reply or a reply without both "country" and "iso".
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform.")
+    socket_path = socket_path or default_socket_path()
+    check_socket(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(str(socket_path))
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps({"op": op, "query": query}).encode("utf-8") + b"\n")
+            stream.flush()
+            if not (line := stream.readline()):
+                raise ConnectionError("Country codes daemon closed the connection.")
+    response = json.loads(line)
+    if isinstance(response, dict) and "error" in response:
+        raise ValueError(response["error"])
+    if not isinstance(response, dict) or not {"country", "iso"} <= response.keys():
+        raise ValueError(f"Malformed reply from the country codes daemon: {line!r}")
+    return response
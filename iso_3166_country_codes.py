@@ -9,18 +9,13 @@ Mapping ISO 3166 country codes to country names.
 ###############################################################################################################################################################
 
 from pathlib import Path
-from functools import cached_property
+from functools import cache, cached_property, lru_cache
 import json
 import logging
+import sys
+import types
 import typing
 
-try:
-    from fuzzywuzzy.process import extractOne
-except ImportError:
-    logging.warning("Approximate country name matching not available. To enable it: pip install fuzzywuzzy")
-    def extractOne(_1, _2, score_cutoff):
-        return None
-
 
 ###############################################################################################################################################################
 #
@@ -30,6 +25,76 @@ except ImportError:
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 
+# (iso_to_country, country_to_iso, folded_country) maps derived from the json data.
+CountryMaps = typing.Tuple[typing.Dict[str, str], typing.Dict[str, str], typing.Dict[str, str]]
+
+
+###############################################################################################################################################################
+#
+#       _rapidfuzz
+#
+###############################################################################################################################################################
+
+@cache
+def _rapidfuzz() -> typing.Optional[typing.Tuple[types.ModuleType, types.ModuleType, types.ModuleType]]:
+    """ Import rapidfuzz on first use, so that exact matches never pay for it. Returns (process, fuzz, utils), or None if it is not installed. """
+    try:
+        from rapidfuzz import fuzz, process, utils
+    except ImportError:
+        logging.warning("Approximate country name matching not available. To enable it: pip install rapidfuzz")
+        return None
+    return process, fuzz, utils
+
+
+###############################################################################################################################################################
+#
+#       _numpy
+#
+###############################################################################################################################################################
+
+@cache
+def _numpy() -> typing.Optional[types.ModuleType]:
+    """ Import numpy, which rapidfuzz needs for batch scoring but does not depend on. Returns None if it is not installed. """
+    try:
+        import numpy
+    except ImportError:
+        logging.warning("Batch country name matching falls back to one query at a time. To enable it: pip install numpy")
+        return None
+    return numpy
+
+
+###############################################################################################################################################################
+#
+#       _extract_one
+#
+###############################################################################################################################################################
+
+def _extract_one(query: str, choices: typing.Iterable[str], score_cutoff: float) -> typing.Optional[typing.Tuple[str, float, int]]:
+    """ Return (choice, score, index) for the choice most similar to <query>, or None if none reaches <score_cutoff>. """
+    if (rapidfuzz := _rapidfuzz()) is None:
+        return None
+    process, fuzz, utils = rapidfuzz
+    return process.extractOne(query, choices, scorer=fuzz.WRatio, processor=utils.default_process, score_cutoff=score_cutoff)
+
+
+###############################################################################################################################################################
+#
+#       _extract_best
+#
+###############################################################################################################################################################
+
+def _extract_best(queries: typing.List[str], choices: typing.Sequence[str], score_cutoff: float) -> typing.List[typing.Optional[int]]:
+    """ Return the index of the choice most similar to each of <queries>, or None where none reaches <score_cutoff>. """
+    if (rapidfuzz := _rapidfuzz()) is None:
+        return [None] * len(queries)
+    if (numpy := _numpy()) is None:
+        return [None if (choice := _extract_one(query, choices, score_cutoff)) is None else choice[2] for query in queries]
+    process, fuzz, utils = rapidfuzz
+    # float64 scores, so that argmax sees the same ties as extractOne.
+    scores = process.cdist(queries, choices, scorer=fuzz.WRatio, processor=utils.default_process, score_cutoff=score_cutoff, dtype=numpy.float64, workers=-1)
+    # cdist zeroes the scores below score_cutoff, so a best score of 0 is only a real match when score_cutoff is 0.
+    return [int(i) if score_cutoff <= 0 or scores[row, i] > 0 else None for row, i in enumerate(scores.argmax(axis=1))]
+
 
 ###############################################################################################################################################################
 #
@@ -51,43 +116,56 @@ class CountryCodes:
         return SCRIPT_DIR/"iso_3166_country_codes.json"
 
     @cached_property
-    def json_data(self) -> json:
+    def json_data(self) -> typing.List[typing.Dict[str, typing.Any]]:
         """ Raw json data from the data file. """
-        return json.loads(self.data_file.read_text(encoding="utf-8"))
+        return json.loads(self.data_file.read_bytes())
+
+    def _build_maps(self) -> CountryMaps:
+        """ Build the (iso_to_country, country_to_iso, folded_country) maps from the json data.
+
+        Keys are interned so that the maps share one string object per code and per folded name.
+        """
+        iso_to_country_map = {}
+        country_to_iso_map = {}
+        folded_country_map = {}
+        for item in self.json_data:
+            country_name = item[self.JSON_COUNTRY_NAME]
+            country_code = sys.intern(item[self.JSON_COUNTRY_CODE])
+            iso_to_country_map[country_code] = country_name
+            folded_name = sys.intern(country_name.casefold())
+            country_to_iso_map[folded_name] = country_code
+            folded_country_map[folded_name] = country_name
+            if (alias_list := item.get(self.JSON_COUNTRY_ALIAS)) is not None:
+                for alias in alias_list:
+                    folded_alias = sys.intern(alias.casefold())
+                    country_to_iso_map[folded_alias] = country_code
+                    folded_country_map[folded_alias] = alias
+        return iso_to_country_map, country_to_iso_map, folded_country_map
+
+    @cached_property
+    def maps(self) -> CountryMaps:
+        """ The (iso_to_country, country_to_iso, folded_country) maps. """
+        return self._build_maps()
 
     @cached_property
     def iso_to_country_map(self) -> typing.Dict[str, str]:
         """ Map of ISO country codes to country names. """
-        return {item["Code"]: item["Name"] for item in self.json_data}
+        return self.maps[0]
 
     @cached_property
     def country_to_iso_map(self) -> typing.Dict[str, str]:
         """ Map of country names and aliases to ISO country codes. """
-        country_to_iso_map = {}
-        for item in self.json_data:
-            country_name = item[self.JSON_COUNTRY_NAME]
-            country_code = item[self.JSON_COUNTRY_CODE]
-            country_to_iso_map[country_name.upper()] = country_code
-            if (alias_list := item.get(self.JSON_COUNTRY_ALIAS)) is not None:
-                for alias in alias_list:
-                    country_to_iso_map[alias.upper()] = country_code
-        return country_to_iso_map
+        return self.maps[1]
 
     @cached_property
-    def countries(self) -> set[str]:
-        """ A set containing a list of all known countries and aliases. """
-        countries = set()
-        for item in self.json_data:
-            countries.add(item[self.JSON_COUNTRY_NAME])
-            if (alias_list := item.get(self.JSON_COUNTRY_ALIAS)) is not None:
-                for alias in alias_list:
-                    countries.add(alias)
-        return countries
+    def countries(self) -> typing.Tuple[str, ...]:
+        """ A tuple of all known countries and aliases. """
+        return tuple(self.folded_country_map.values())
 
     @cached_property
-    def upper_country_map(self) -> typing.Dict[str, str]:
-        """ Map of upper case country names to correctly capitalized country names. """
-        return {c.upper(): c for c in self.countries}
+    def folded_country_map(self) -> typing.Dict[str, str]:
+        """ Map of case folded country names to correctly capitalized country names. """
+        return self.maps[2]
 
     @cached_property
     def codes(self) -> set[str]:
@@ -96,24 +174,43 @@ class CountryCodes:
 
     def country_from_iso(self, iso: str) -> str:
         """ Return the country corresponding to iso. """
+        # Codes are usually given in their canonical upper case form, so try them as is before normalizing.
+        if (country := self.iso_to_country_map.get(iso)) is not None:
+            return country
         return self.iso_to_country_map.get(iso.upper())
 
     def iso_from_country(self, country: str) -> str:
         """ Return the 1st ISO for country (there should only ever be one). """
-        return self.country_to_iso_map.get(country.upper())
+        return self.country_to_iso_map.get(country.casefold())
 
+    @lru_cache(maxsize=1024)
     def match_country(self, country: str, cutoff: int=90) -> str:
         """ Return the best known country match for <country> with confidence better than <cutoff>. """
-        if (country_match := self.upper_country_map.get(country.upper())) is not None:
+        if (country_match := self.folded_country_map.get(country.casefold())) is not None:
             return country_match
-        if (country_match := extractOne(country, self.countries, score_cutoff=cutoff)) is not None:
+        if (country_match := _extract_one(country, self.countries, score_cutoff=cutoff)) is not None:
             return country_match[0]
         return None
 
+    def match_countries(self, countries: typing.List[str], cutoff: int=90) -> typing.List[typing.Optional[str]]:
+        """ Return match_country(country, cutoff) for each of <countries>, scoring the fuzzy matches in one batch. """
+        folded_countries = [country.casefold() for country in countries]
+        country_matches = [self.folded_country_map.get(folded_country) for folded_country in folded_countries]
+        if misses := [i for i, country_match in enumerate(country_matches) if country_match is None]:
+            best_matches = _extract_best([countries[i] for i in misses], self.countries, score_cutoff=cutoff)
+            for i, best_match in zip(misses, best_matches):
+                if best_match is not None:
+                    country_matches[i] = self.countries[best_match]
+        return country_matches
+
     def __getitem__(self, iso: str) -> str:
         return self.country_from_iso(iso)
 
     def __getattr__(self, iso: str) -> str:
+        # Only attributes shaped like an ISO code are looked up, so dunder/introspection probes (copy, pickle, IPython...)
+        # and misspelt attribute names fail without a map lookup or formatting a message.
+        if len(iso) not in (2, 3) or not iso.isalpha():
+            raise AttributeError(iso)
         if (country := self.country_from_iso(iso)) is None:
             raise AttributeError(f"Country code '{iso}' not defined in ISO-3166.")
         return country
@@ -0,0 +1,27 @@
+"""
+Make the repository importable as the country_codes package, which is how its modules import each other.
+"""
+
+from pathlib import Path
+import importlib.util
+import os
+import sys
+
+import pytest
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+if "country_codes" not in sys.modules:
+    spec = importlib.util.spec_from_file_location("country_codes", ROOT_DIR/"__init__.py", submodule_search_locations=[str(ROOT_DIR)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["country_codes"] = module
+    spec.loader.exec_module(module)
+
+
+@pytest.fixture
+def package_path(tmp_path: Path) -> str:
+    """ A PYTHONPATH under which a subprocess can import the repository as country_codes. """
+    (tmp_path/"site").mkdir()
+    (tmp_path/"site"/"country_codes").symlink_to(ROOT_DIR, target_is_directory=True)
+    return os.pathsep.join([str(tmp_path/"site"), os.environ.get("PYTHONPATH", "")])
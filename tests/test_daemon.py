@@ -0,0 +1,147 @@
+from pathlib import Path
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from country_codes import country_code, daemon
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets are not supported on this platform.")
+
+
+###############################################################################################################################################################
+#
+#       parse_args
+#
+###############################################################################################################################################################
+
+@pytest.mark.parametrize("argv, expected", [
+    (["France"], (False, False, "France")),
+    (["--iso", "fr"], (True, False, "fr")),
+    (["fr", "--client", "--iso"], (True, True, "fr")),
+])
+def test_parse_args_fast_path(monkeypatch, argv, expected):
+    monkeypatch.setitem(sys.modules, "argparse", None)
+    assert country_code.parse_args(argv) == expected
+
+
+def test_parse_args_argparse_path():
+    assert country_code.parse_args(["--iso", "--", "-fr"]) == (True, False, "-fr")
+
+
+@pytest.mark.parametrize("argv", [[], ["France", "Spain"], ["--bogus", "France"], ["--help"]])
+def test_parse_args_argparse_exits(argv):
+    with pytest.raises(SystemExit):
+        country_code.parse_args(argv)
+
+
+###############################################################################################################################################################
+#
+#       lookup
+#
+###############################################################################################################################################################
+
+def test_lookup():
+    assert daemon.lookup("iso", "fr") == {"country": "France", "iso": "FR"}
+    assert daemon.lookup("country", "france") == {"country": "France", "iso": "FR"}
+    assert daemon.lookup("iso", "qq") == {"country": None, "iso": None}
+
+
+def test_lookup_errors():
+    with pytest.raises(TypeError):
+        daemon.lookup("iso", 1)
+    with pytest.raises(ValueError):
+        daemon.lookup("bogus", "fr")
+
+
+###############################################################################################################################################################
+#
+#       serve / request
+#
+###############################################################################################################################################################
+
+@pytest.fixture
+def daemon_socket(tmp_path: Path, package_path: str):
+    """ Path of the socket of a daemon running in a subprocess, which is interrupted once the test is done. """
+    socket_path = tmp_path/"run"/"daemon.sock"
+    env = dict(os.environ, COUNTRY_CODES_SOCKET=str(socket_path), PYTHONPATH=package_path)
+    process = subprocess.Popen([sys.executable, "-m", "country_codes", "--serve"], env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.is_socket():
+            assert process.poll() is None and time.monotonic() < deadline, "daemon did not start"
+            time.sleep(0.05)
+        yield socket_path
+    finally:
+        process.send_signal(signal.SIGINT)
+        assert process.wait(timeout=10) == 0
+    assert not socket_path.exists()
+
+
+def test_round_trip(daemon_socket):
+    assert daemon.request("iso", "fr", daemon_socket) == {"country": "France", "iso": "FR"}
+    assert daemon.request("country", "Fance", daemon_socket) == {"country": "France", "iso": "FR"}
+    assert daemon.request("iso", "qq", daemon_socket) == {"country": None, "iso": None}
+    with pytest.raises(ValueError):
+        daemon.request("bogus", "fr", daemon_socket)
+
+
+def test_malformed_requests(daemon_socket):
+    lines = [b"not json", b"[1]", b'{"op": "iso"}', b'{"op": "iso", "query": 1}', b'{"op": "bogus", "query": "fr"}']
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(daemon_socket))
+        with sock.makefile("rwb") as stream:
+            for line in lines:
+                stream.write(line + b"\n")
+                stream.flush()
+                assert "error" in json.loads(stream.readline())
+
+
+def test_second_daemon_refused(daemon_socket):
+    assert daemon.serve(daemon_socket) == -1
+    assert daemon_socket.is_socket()
+
+
+def test_serve_keeps_other_files(tmp_path):
+    socket_path = tmp_path/"daemon.sock"
+    socket_path.write_text("keep")
+    assert daemon.serve(socket_path) == -1
+    assert socket_path.read_text() == "keep"
+
+
+@pytest.mark.parametrize("reply", [b"[]", b"null", b'{"country": "France"}', b"not json"])
+def test_malformed_reply(tmp_path, reply):
+    socket_path = tmp_path/"daemon.sock"
+
+    def answer(server: socket.socket) -> None:
+        connection, _ = server.accept()
+        with connection, connection.makefile("rwb") as stream:
+            stream.readline()
+            stream.write(reply + b"\n")
+            stream.flush()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+        thread = threading.Thread(target=answer, args=(server,))
+        thread.start()
+        try:
+            with pytest.raises(ValueError):
+                daemon.request("iso", "fr", socket_path)
+        finally:
+            thread.join()
+
+
+def test_request_without_daemon(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        daemon.request("iso", "fr", tmp_path/"daemon.sock")
+    with pytest.raises(PermissionError):
+        (tmp_path/"file.sock").write_text("")
+        daemon.request("iso", "fr", tmp_path/"file.sock")
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from country_codes import COUNTRY_CODES
+from country_codes import iso_3166_country_codes
+
+
+pytest.importorskip("rapidfuzz")
+
+CUTOFFS = [90, 70, 50, 30, 0]
+
+
+def perturbed_names(count: int, seed: int=11) -> list:
+    """ Country names with a few random deletions, insertions and substitutions. """
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        name = list(rng.choice(COUNTRY_CODES.countries))
+        for _ in range(rng.randint(0, 5)):
+            if not name:
+                break
+            i, op = rng.randrange(len(name)), rng.random()
+            if op < 0.4:
+                del name[i]
+            elif op < 0.7:
+                name.insert(i, rng.choice("abcdefg "))
+            else:
+                name[i] = rng.choice("xyz")
+        names.append("".join(name) or "a")
+    return names
+
+
+# 'Sra', 'ul' and 'omuda' tie between several countries, which must resolve the same way one at a time and in a batch.
+# '!!!' scores 0 against every country, which is still a match at cutoff 0.
+QUERIES = ["Sra", "ul", "omuda", "!!!", "Korea", "  France", "Russia", "france", "Fance", "zzzz"] + perturbed_names(500)
+
+
+###############################################################################################################################################################
+#
+#       match_countries
+#
+###############################################################################################################################################################
+
+@pytest.fixture
+def no_numpy(monkeypatch):
+    monkeypatch.setattr(iso_3166_country_codes, "_numpy", lambda: None)
+
+
+@pytest.mark.parametrize("cutoff", CUTOFFS)
+def test_match_countries(cutoff):
+    pytest.importorskip("numpy")
+    assert COUNTRY_CODES.match_countries(QUERIES, cutoff) == [COUNTRY_CODES.match_country(query, cutoff) for query in QUERIES]
+
+
+@pytest.mark.parametrize("cutoff", CUTOFFS)
+def test_match_countries_without_numpy(no_numpy, cutoff):
+    assert COUNTRY_CODES.match_countries(QUERIES, cutoff) == [COUNTRY_CODES.match_country(query, cutoff) for query in QUERIES]
+
+
+def test_match_country():
+    assert COUNTRY_CODES.match_country("france") == "France"
+    assert COUNTRY_CODES.match_country("Fance") == "France"
+    assert COUNTRY_CODES.match_country("zzzz") is None